@@ -123,7 +123,7 @@ public class PythonEnvironmentManager
             var startInfo = new ProcessStartInfo
             {
                 FileName = PythonExecutable,
-                Arguments = $"\"{bridgeScript}\" --list-voices",
+                Arguments = $"\"{bridgeScript}\" --verify",
                 UseShellExecute = false,
                 RedirectStandardOutput = true,
                 RedirectStandardError = true,
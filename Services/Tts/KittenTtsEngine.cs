@@ -2,6 +2,7 @@ using Microsoft.Extensions.Logging;
 using CarelessWhisperV2.Services.Python;
 using CarelessWhisperV2.Models;
 using System.Diagnostics;
+using System.Text;
 using System.Text.Json;
 using System.IO;
 
@@ -16,6 +17,14 @@ public class KittenTtsEngine : ITtsEngine, IDisposable
     private bool _initializationAttempted = false;
     private bool _initializationSucceeded = false;
 
+    // Long-lived "--server" bridge that keeps the KittenTTS model loaded between utterances
+    private static readonly TimeSpan ServerRequestTimeout = TimeSpan.FromSeconds(30);
+    private static readonly JsonSerializerOptions ResponseJsonOptions = new() { PropertyNameCaseInsensitive = true };
+    private readonly SemaphoreSlim _serverLock = new(1, 1);
+    private Process? _serverProcess;
+    private bool _serverAnswered;
+    private bool _serverUnavailable;
+
     public string EngineInfo => "KittenTTS v0.1 - High-quality neural TTS";
 
     public KittenTtsEngine(PythonEnvironmentManager pythonManager, ILogger<KittenTtsEngine> logger)
@@ -68,26 +77,9 @@ public class KittenTtsEngine : ITtsEngine, IDisposable
             
             try
             {
-                // Build command arguments for Python bridge
-                var bridgeScript = Path.Combine(_pythonManager.ScriptsDirectory, "kitten_tts_bridge.py");
-                var escapedText = JsonSerializer.Serialize(text);
-                var arguments = $"\"{bridgeScript}\" --text {escapedText} --voice \"{options.Voice}\" --speed {options.Speed:F1} --output \"{outputPath}\"";
-
-                var startInfo = new ProcessStartInfo
-                {
-                    FileName = _pythonManager.PythonExecutable,
-                    Arguments = arguments,
-                    UseShellExecute = false,
-                    RedirectStandardOutput = true,
-                    RedirectStandardError = true,
-                    CreateNoWindow = true,
-                    WorkingDirectory = _pythonManager.ScriptsDirectory
-                };
-
-                _logger.LogDebug("Starting TTS generation: {Arguments}", arguments);
-
-                // Execute KittenTTS via Python bridge
-                var result = await _pythonManager.ExecutePythonScriptAsync(startInfo);
+                // Prefer the resident bridge; a one-shot bridge run is the fallback
+                var result = await GenerateWithServerAsync(text, options, outputPath)
+                    ?? await GenerateWithOneShotAsync(text, options, outputPath);
                 stopwatch.Stop();
 
                 if (result.Success && File.Exists(outputPath))
@@ -151,6 +143,171 @@ public class KittenTtsEngine : ITtsEngine, IDisposable
         }
     }
 
+    private async Task<ProcessResult> GenerateWithOneShotAsync(string text, TtsOptions options, string outputPath)
+    {
+        // Build command arguments for Python bridge
+        var bridgeScript = Path.Combine(_pythonManager.ScriptsDirectory, "kitten_tts_bridge.py");
+        var escapedText = JsonSerializer.Serialize(text);
+        var arguments = $"\"{bridgeScript}\" --text {escapedText} --voice \"{options.Voice}\" --speed {options.Speed:F1} --output \"{outputPath}\"";
+
+        var startInfo = new ProcessStartInfo
+        {
+            FileName = _pythonManager.PythonExecutable,
+            Arguments = arguments,
+            UseShellExecute = false,
+            RedirectStandardOutput = true,
+            RedirectStandardError = true,
+            CreateNoWindow = true,
+            WorkingDirectory = _pythonManager.ScriptsDirectory
+        };
+
+        _logger.LogDebug("Starting TTS generation: {Arguments}", arguments);
+
+        // Execute KittenTTS via Python bridge
+        return await _pythonManager.ExecutePythonScriptAsync(startInfo);
+    }
+
+    private async Task<ProcessResult?> GenerateWithServerAsync(string text, TtsOptions options, string outputPath)
+    {
+        if (_serverUnavailable)
+            return null;
+
+        await _serverLock.WaitAsync();
+        var stopwatch = Stopwatch.StartNew();
+
+        try
+        {
+            var process = GetServerProcess();
+            if (process == null)
+                return null;
+
+            // One JSON request per line; the bridge answers each with one JSON line on stdout
+            var request = JsonSerializer.Serialize(new
+            {
+                text,
+                voice = options.Voice,
+                speed = Math.Round((decimal)options.Speed, 1),
+                output = outputPath
+            });
+            await process.StandardInput.WriteLineAsync(request);
+            await process.StandardInput.FlushAsync();
+
+            var readTask = process.StandardOutput.ReadLineAsync();
+            if (await Task.WhenAny(readTask, Task.Delay(ServerRequestTimeout)) != readTask)
+            {
+                AbandonServer($"did not answer within {ServerRequestTimeout.TotalSeconds} seconds");
+                return null;
+            }
+
+            var line = await readTask;
+            if (line == null)
+            {
+                AbandonServer("exited unexpectedly");
+                return null;
+            }
+
+            var response = JsonSerializer.Deserialize<BridgeResponse>(line, ResponseJsonOptions);
+            var success = response?.Success == true;
+            if (success)
+                _serverAnswered = true;
+
+            return new ProcessResult
+            {
+                Success = success,
+                StandardOutput = line,
+                ErrorOutput = response?.Error ?? "",
+                Duration = stopwatch.Elapsed,
+                ExitCode = 0
+            };
+        }
+        catch (Exception ex)
+        {
+            _logger.LogDebug(ex, "KittenTTS server request failed");
+            AbandonServer("request failed");
+            return null;
+        }
+        finally
+        {
+            _serverLock.Release();
+        }
+    }
+
+    private Process? GetServerProcess()
+    {
+        if (_serverProcess != null)
+        {
+            if (!_serverProcess.HasExited)
+                return _serverProcess;
+
+            AbandonServer("exited");
+            if (_serverUnavailable)
+                return null;
+        }
+
+        var bridgeScript = Path.Combine(_pythonManager.ScriptsDirectory, "kitten_tts_bridge.py");
+        var startInfo = new ProcessStartInfo
+        {
+            FileName = _pythonManager.PythonExecutable,
+            Arguments = $"\"{bridgeScript}\" --server",
+            UseShellExecute = false,
+            RedirectStandardInput = true,
+            RedirectStandardOutput = true,
+            RedirectStandardError = true,
+            StandardInputEncoding = new UTF8Encoding(false),
+            StandardOutputEncoding = Encoding.UTF8,
+            CreateNoWindow = true,
+            WorkingDirectory = _pythonManager.ScriptsDirectory
+        };
+
+        var process = new Process { StartInfo = startInfo };
+        // Drain stderr so library output can never fill the pipe and stall the server
+        process.ErrorDataReceived += (_, e) =>
+        {
+            if (!string.IsNullOrEmpty(e.Data))
+                _logger.LogDebug("KittenTTS server: {Line}", e.Data);
+        };
+        process.Start();
+        process.BeginErrorReadLine();
+
+        _serverProcess = process;
+        _logger.LogInformation("Started KittenTTS server process (PID {ProcessId})", process.Id);
+        return process;
+    }
+
+    private void AbandonServer(string reason)
+    {
+        _logger.LogWarning("KittenTTS server {Reason}, stopping it", reason);
+        StopServer();
+
+        // A server that never produced audio won't do better after a restart
+        if (!_serverAnswered)
+            _serverUnavailable = true;
+    }
+
+    private void StopServer()
+    {
+        if (_serverProcess == null)
+            return;
+
+        try
+        {
+            if (!_serverProcess.HasExited)
+            {
+                // EOF on stdin lets the bridge shut down its batch workers cleanly
+                _serverProcess.StandardInput.Close();
+                if (!_serverProcess.WaitForExit(2000))
+                    _serverProcess.Kill(true);
+            }
+        }
+        catch (Exception ex)
+        {
+            _logger.LogDebug(ex, "Failed to stop KittenTTS server process");
+        }
+
+        _serverProcess.Dispose();
+        _serverProcess = null;
+    }
+
     public async Task<bool> IsAvailableAsync()
     {
         try
@@ -291,12 +448,19 @@ public class KittenTtsEngine : ITtsEngine, IDisposable
     {
         if (!_disposed)
         {
+            StopServer();
             _cachedVoices = null;
             _disposed = true;
             _logger.LogDebug("KittenTtsEngine disposed");
         }
     }
 
+    private class BridgeResponse
+    {
+        public bool Success { get; set; }
+        public string? Error { get; set; }
+    }
+
     private class VoiceListResponse
     {
         public bool Success { get; set; }
@@ -1,17 +1,407 @@
 #!/usr/bin/env python3
 # kitten_tts_bridge.py - Bridge script with comprehensive phonemizer patching
 
-import argparse
+import ctypes
+import hashlib
+import io
 import json
+import queue
+import re
 import sys
-import tempfile
 import os
+import shutil
 from pathlib import Path
-import subprocess
+import sqlite3
+import threading
 import types
+from collections import OrderedDict
 
-# Monkey patches for dependency issues
 try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj):
+    """Serialize obj to a JSON string, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+
+# Options for every eSpeak subprocess: no inherited handles, and no console window
+# flashing up on Windows for each spawn
+_SUBPROCESS_KW = {'close_fds': True}
+if sys.platform == 'win32':
+    _SUBPROCESS_KW['creationflags'] = 0x08000000  # subprocess.CREATE_NO_WINDOW
+
+
+class EspeakLibrary:
+    """In-process eSpeak phonemizer loaded from the shared library via ctypes."""
+    
+    # espeak_Initialize output mode: synchronous, no audio playback
+    AUDIO_OUTPUT_SYNCHRONOUS = 0x02
+    # espeak_Initialize option: report a missing espeak-data instead of calling exit()
+    INITIALIZE_DONT_EXIT = 0x8000
+    # espeak_TextToPhonemes modes: UTF-8 input, IPA output
+    CHARS_UTF8 = 1
+    PHONEMES_IPA = 0x02
+    
+    def __init__(self, library_path, data_path=None):
+        self.library_path = str(library_path)
+        self._lib = ctypes.cdll.LoadLibrary(self.library_path)
+        self._lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        self._lib.espeak_Initialize.restype = ctypes.c_int
+        self._lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        self._lib.espeak_SetVoiceByName.restype = ctypes.c_int
+        self._lib.espeak_TextToPhonemes.argtypes = [ctypes.POINTER(ctypes.c_char_p), ctypes.c_int, ctypes.c_int]
+        self._lib.espeak_TextToPhonemes.restype = ctypes.c_char_p
+        self._lib.espeak_Info.argtypes = [ctypes.c_void_p]
+        self._lib.espeak_Info.restype = ctypes.c_char_p
+        
+        # eSpeak expects the directory containing espeak-data, not espeak-data itself
+        data_root = str(Path(data_path).parent).encode('utf-8') if data_path else None
+        if self._lib.espeak_Initialize(self.AUDIO_OUTPUT_SYNCHRONOUS, 0, data_root, self.INITIALIZE_DONT_EXIT) <= 0:
+            raise OSError(f"espeak_Initialize failed for {library_path}")
+        self._voice = None
+    
+    def g2p(self, text, voice):
+        """Convert text to IPA phonemes, one clause per espeak_TextToPhonemes call."""
+        if voice != self._voice:
+            if self._lib.espeak_SetVoiceByName(voice.encode('utf-8')) != 0:
+                raise ValueError(f"eSpeak voice not available: {voice}")
+            self._voice = voice
+        
+        text_ptr = ctypes.c_char_p(text.encode('utf-8'))
+        text_ptr_ptr = ctypes.pointer(text_ptr)
+        clauses = []
+        while text_ptr.value is not None:
+            phonemes = self._lib.espeak_TextToPhonemes(text_ptr_ptr, self.CHARS_UTF8, self.PHONEMES_IPA)
+            if phonemes:
+                clauses.append(phonemes.decode('utf-8'))
+        return ' '.join(' '.join(clauses).split())
+    
+    def version_info(self):
+        """Return the library's version string, e.g. "1.48.03" or "1.51"."""
+        return (self._lib.espeak_Info(None) or b'').decode('utf-8', 'replace')
+
+
+def load_espeak_library(espeak_dir, data_path=None):
+    """Load the bundled (or system) eSpeak shared library, or return None if unavailable."""
+    import ctypes.util
+    
+    # The bundled data only matches the bundled library; a system library uses its own
+    bundled_data = data_path if data_path and Path(data_path).exists() else None
+    candidates = [(espeak_dir / name, bundled_data)
+                  for name in ('libespeak-ng.dll', 'espeak-ng.dll', 'libespeak.dll')
+                  if (espeak_dir / name).exists()]
+    for name in ('espeak-ng', 'espeak'):
+        found = ctypes.util.find_library(name)
+        if found:
+            candidates.append((found, None))
+    
+    for candidate, candidate_data in candidates:
+        try:
+            return EspeakLibrary(candidate, candidate_data)
+        except (OSError, AttributeError):
+            continue
+    return None
+
+
+class EspeakProcess:
+    """Long-lived eSpeak process phonemizing one line of stdin at a time."""
+    
+    # A nonsense word whose phonemes mark the end of each utterance on stdout
+    SENTINEL = "zqxjv"
+    
+    def __init__(self, cmd, timeout=30, startup_timeout=1):
+        import subprocess
+        
+        self.timeout = timeout
+        self._proc = None
+        # Without a text argument or --stdin, eSpeak reads and answers stdin line by line
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL, text=True, encoding='utf-8',
+                                      **_SUBPROCESS_KW)
+        self._lines = queue.Queue()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        
+        # Learn what the sentinel looks like; a build that doesn't answer per line (e.g. one
+        # that block-buffers a piped stdout) fails here, so keep that wait short
+        self._sentinel_phonemes = None
+        self._send(self.SENTINEL)
+        self._sentinel_phonemes = self._next_line(startup_timeout)
+    
+    def g2p(self, text):
+        """Convert one text to IPA phonemes."""
+        with self._lock:
+            self._send(' '.join(text.split()))
+            self._send(self.SENTINEL)
+            clauses = []
+            while True:
+                line = self._next_line()
+                if line == self._sentinel_phonemes:
+                    return ' '.join(clauses)
+                clauses.append(line)
+    
+    def close(self):
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        self._proc.kill()
+        self._proc = None
+    
+    def __del__(self):
+        self.close()
+    
+    def _send(self, line):
+        self._proc.stdin.write(line + "\n")
+        self._proc.stdin.flush()
+    
+    def _next_line(self, timeout=None):
+        """Return the next non-blank output line, closing the process if eSpeak stops answering."""
+        while True:
+            try:
+                line = self._lines.get(timeout=timeout or self.timeout)
+            except queue.Empty:
+                line = None
+            if line is None:
+                self.close()
+                raise OSError("eSpeak process stopped responding")
+            line = ' '.join(line.split())
+            if line:
+                return line
+    
+    def _read_stdout(self):
+        for line in self._proc.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+
+# Only long-running modes (--server, --batch) keep an eSpeak process open; a one-shot run
+# would pay its startup handshake without ever reusing the pipe
+_use_espeak_process = False
+
+# Bumped whenever a text falls back to the emergency IPA mapping, so audio made from it stays
+# out of the audio cache
+_phoneme_fallbacks = 0
+
+
+class PhonemeCache:
+    """LRU cache of eSpeak output, persisted to SQLite so repeated phrases survive restarts."""
+    
+    def __init__(self, db_path, maxsize=4096, max_rows=100000):
+        self.db_path = Path(db_path)
+        self.maxsize = maxsize
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._db = None
+        self._db_failed = False
+    
+    @staticmethod
+    def make_key(engine, language, with_stress, text):
+        # engine identifies the eSpeak build, so output from another version is never served
+        key = f"{engine}|{language}|{with_stress}|{text}"
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def get(self, engine, language, with_stress, text):
+        """Return the cached IPA for text, or None on a miss."""
+        key = self.make_key(engine, language, with_stress, text)
+        phonemes = self._entries.get(key)
+        if phonemes is not None:
+            self._entries.move_to_end(key)
+            return phonemes
+        
+        db = self._connect()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT ipa FROM phonemes WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is not None:
+            self._remember(key, row[0])
+            return row[0]
+        return None
+    
+    def put_many(self, engine, language, with_stress, entries):
+        """Cache (text, ipa) pairs in memory and on disk."""
+        rows = [(self.make_key(engine, language, with_stress, text), phonemes) for text, phonemes in entries]
+        if not rows:
+            return
+        for key, phonemes in rows:
+            self._remember(key, phonemes)
+        
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            with db:
+                db.executemany("INSERT OR REPLACE INTO phonemes (key, ipa) VALUES (?, ?)", rows)
+                # Keep the table bounded; new and replaced rows get the highest rowids, so the
+                # rows dropped are the ones written longest ago (including other builds' output)
+                db.execute("DELETE FROM phonemes WHERE rowid <= (SELECT MAX(rowid) FROM phonemes) - ?",
+                           (self.max_rows,))
+        except sqlite3.Error:
+            pass
+    
+    def get_version(self, engine):
+        """Return the eSpeak version recorded for engine ('' if it was unknown), or None."""
+        db = self._connect()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT version FROM espeak_versions WHERE engine = ?", (engine,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row is not None else None
+    
+    def put_version(self, engine, version):
+        """Record the probed eSpeak version for engine, so later processes skip the probe."""
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            with db:
+                db.execute("INSERT OR REPLACE INTO espeak_versions (engine, version) VALUES (?, ?)",
+                           (engine, version))
+        except sqlite3.Error:
+            pass
+    
+    def _remember(self, key, phonemes):
+        self._entries[key] = phonemes
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def _connect(self):
+        # The disk cache is optional: a read-only profile just leaves us with the in-memory LRU
+        if self._db is None and not self._db_failed:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(self.db_path))
+                self._db.execute("CREATE TABLE IF NOT EXISTS phonemes (key TEXT PRIMARY KEY, ipa TEXT)")
+                self._db.execute("CREATE TABLE IF NOT EXISTS espeak_versions (engine TEXT PRIMARY KEY, version TEXT)")
+            except (OSError, sqlite3.Error):
+                self._db = None
+                self._db_failed = True
+        return self._db
+
+
+phoneme_cache = PhonemeCache(Path.home() / ".careless_whisper" / "phoneme_cache.sqlite")
+
+# Very basic character mapping for emergencies
+# This is not perfect but better than returning plain English
+# Single letters go through str.translate; only the digraphs need a regex pass
+_BASIC_IPA_VOWELS = str.maketrans({'a': 'æ', 'e': 'ɛ', 'i': 'ɪ', 'o': 'ɔ', 'u': 'ʊ'})
+_BASIC_IPA_DIGRAPHS = {'th': 'θ', 'sh': 'ʃ', 'ch': 'ʧ', 'ng': 'ŋ'}
+_BASIC_IPA_DIGRAPH_RE = re.compile('|'.join(_BASIC_IPA_DIGRAPHS))
+
+# Collapses runs of whitespace (including newlines) in raw eSpeak output
+_WS_RE = re.compile(rb'\s+')
+
+# eSpeak 1.48.15 and later (including eSpeak NG) mark language switches inline, e.g. "(fr)"
+_LANGUAGE_FLAG_RE = re.compile(r'\([a-z]{2,3}(?:-[a-z0-9]+)*\)')
+_ESPEAK_VERSION_RE = re.compile(r'(\d+)\.(\d+)(?:\.(\d+))?')
+
+def _parse_espeak_version(info):
+    """Parse "eSpeak text-to-speech: 1.48.03 ..." style output into a version tuple."""
+    match = _ESPEAK_VERSION_RE.search(info)
+    if match is None:
+        return None
+    return tuple(int(part) for part in match.groups() if part is not None)
+
+def _espeak_identity(path):
+    """Name an eSpeak binary by path and modification time, so a replaced build gets new cache keys."""
+    try:
+        return f"{path}|{os.stat(path).st_mtime_ns}"
+    except OSError:
+        return str(path)
+
+def _select_espeak_postproc(version):
+    """Pick the clean-up that makes an eSpeak version's IPA match the 1.48.03 output we emulate."""
+    if version is None or version < (1, 48, 15):
+        return lambda phonemes: phonemes
+    return lambda phonemes: ' '.join(_LANGUAGE_FLAG_RE.sub('', phonemes).split())
+
+# Monkey patches for dependency issues are installed on first model load, so commands
+# that never touch the model (e.g. --list-voices) skip them entirely
+_PATCHED = False
+KittenTTS = None
+
+# Written next to the script at packaging time by --write-bootstrap-env
+_BOOTSTRAP_ENV_FILE = "_bootstrap_env.json"
+
+def _scrubbed_sys_path():
+    return [p for p in sys.path if 'AppData' not in p and 'site-packages' not in p or 'Lib\\site-packages' in p]
+
+def _load_bootstrap_sys_path(script_dir):
+    """Return the precomputed sys.path for this bundle, or None if it is missing or stale."""
+    try:
+        data = json.loads((script_dir / _BOOTSTRAP_ENV_FILE).read_text(encoding='utf-8'))
+        # Bundle entries are relative to the script so the bundle can be moved after packaging
+        resolve = lambda p: os.path.normpath(os.path.join(script_dir, p))
+        
+        # Only valid for the interpreter it was written by
+        if tuple(data["python_version"]) != tuple(sys.version_info[:3]):
+            return None
+        if os.path.normcase(resolve(data["executable"])) != os.path.normcase(os.path.normpath(sys.executable)):
+            return None
+        entries = [resolve(p) for p in data["sys_path"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    
+    # A file written for another layout must never replace a working sys.path
+    if not all(os.path.exists(p) for p in entries):
+        return None
+    return entries
+
+def _bundle_relative(path, script_dir, bundle_root):
+    """Make a path inside the bundle relative to the script; anything else is kept as is."""
+    try:
+        in_bundle = os.path.commonpath([os.path.abspath(path), bundle_root]) == bundle_root
+    except ValueError:
+        # Different drive
+        in_bundle = False
+    return os.path.relpath(path, script_dir) if in_bundle else path
+
+def write_bootstrap_env(script_dir):
+    """Precompute the scrubbed sys.path for the current bundle and save it next to the script."""
+    # Paths inside the bundle (scripts\ and python\ share a parent) move with it
+    bundle_root = os.path.dirname(script_dir)
+    # PYTHONPATH belongs to the packaging shell, not the bundle
+    pythonpath = {os.path.normcase(os.path.abspath(p))
+                  for p in os.environ.get('PYTHONPATH', '').split(os.pathsep) if p}
+    entries = [
+        _bundle_relative(p, script_dir, bundle_root)
+        for p in _scrubbed_sys_path()
+        # Missing entries (e.g. an absent pythonXY.zip) import nothing, and the loader
+        # rejects files listing them
+        if p and os.path.exists(p) and os.path.normcase(os.path.abspath(p)) not in pythonpath
+    ]
+    
+    bootstrap = {
+        "python_version": list(sys.version_info[:3]),
+        "executable": _bundle_relative(sys.executable, script_dir, bundle_root),
+        "sys_path": entries,
+    }
+    bootstrap_path = script_dir / _BOOTSTRAP_ENV_FILE
+    bootstrap_path.write_text(json.dumps(bootstrap, indent=2), encoding='utf-8')
+    return bootstrap_path
+
+def _install_patches():
+    """Point eSpeak at the bundled copy, patch misaki/phonemizer and import KittenTTS (once)."""
+    global _PATCHED, KittenTTS
+    if _PATCHED:
+        return
+    
+    # Only needed once eSpeak is actually invoked, so kept off the import path
+    import subprocess
+    
     # Set up bundled eSpeak before any imports
     script_dir = Path(__file__).parent.absolute()
     python_dir = script_dir.parent / "python" if script_dir.name == "scripts" else script_dir
@@ -26,10 +416,10 @@ try:
         if espeak_data.exists():
             os.environ['ESPEAK_DATA_PATH'] = str(espeak_data)
         
-        # Remove system python paths from sys.path to force bundled packages
-        original_paths = sys.path[:]
-        filtered_paths = [p for p in sys.path if 'AppData' not in p and 'site-packages' not in p or 'Lib\\site-packages' in p]
-        sys.path[:] = filtered_paths
+        # Remove system python paths from sys.path to force bundled packages; packaged
+        # installs ship the result precomputed so the scrub is skipped
+        baked_sys_path = _load_bootstrap_sys_path(script_dir)
+        sys.path[:] = baked_sys_path if baked_sys_path is not None else _scrubbed_sys_path()
         
         # Add eSpeak directory to PATH so it can be found by subprocess calls
         current_path = os.environ.get('PATH', '')
@@ -42,6 +432,9 @@ try:
         if espeak_data.exists():
             os.environ['PHONEMIZER_ESPEAK_PATH'] = str(espeak_data)
     
+    # Prefer the eSpeak library in-process; the espeak.exe subprocess is only the fallback
+    espeak_library = load_espeak_library(espeak_exe.parent, espeak_data)
+    
     # Real num2words is now available in site-packages, no need for custom implementation
     
     # Create comprehensive phonemizer patches
@@ -61,6 +454,15 @@ try:
     
     # Create a fully functional EspeakBackend that bypasses all detection
     class PatchedEspeakBackend:
+        # Output clean-up for the installed eSpeak, probed once and shared by all instances
+        _postproc = None
+        # Set once the persistent eSpeak process fails, so no other instance retries it
+        _process_failed = False
+        # Set once the eSpeak library fails to phonemize, so every instance uses espeak.exe
+        _engine_failed = False
+        # Phoneme cache identity of the eSpeak library and executable, computed once each
+        _identities = {}
+        
         def __init__(self, language='en-us', preserve_punctuation=False, with_stress=False, 
                      tie=False, language_switch='keep-flags', words_mismatch='ignore'):
             self.language = language
@@ -70,53 +472,259 @@ try:
             self.language_switch = language_switch
             self.words_mismatch = words_mismatch
             self.espeak_exe = str(espeak_exe) if espeak_exe.exists() else 'espeak'
+            self._engine = None if PatchedEspeakBackend._engine_failed else espeak_library
+            self._process = None
+            self._digit_table = None
         
         def phonemize(self, text_list, separator=' ', strip=False, njobs=1, **kwargs):
             """Phonemize using our bundled eSpeak directly to produce real IPA phonemes"""
             if isinstance(text_list, str):
                 text_list = [text_list]
             
-            results = []
-            for text in text_list:
-                # Use our bundled eSpeak to get proper IPA phonemes (not just text!)
-                cmd = [self.espeak_exe, '-q', '--ipa']
-                if espeak_data.exists():
-                    cmd.extend(['--path', str(espeak_data)])
-                cmd.append(text)
-                
+            results = [None] * len(text_list)
+            pending = []
+            for i, text in enumerate(text_list):
+                stripped = text.strip()
+                if not stripped:
+                    # Nothing to pronounce, never start eSpeak for it
+                    results[i] = ''
+                    continue
+                if stripped.isdigit() and len(stripped) <= 3:
+                    results[i] = self._digit_ipa(stripped)
+                    if results[i] is not None:
+                        continue
+                pending.append(i)
+            
+            if pending:
+                computed = self._phonemize_cached([text_list[i] for i in pending])
+                for i, phonemes in zip(pending, computed):
+                    results[i] = phonemes
+            
+            # If eSpeak fails, we need to provide some basic phoneme mapping
+            # This is critical - returning plain text breaks KittenTTS neural network
+            global _phoneme_fallbacks
+            for i, phonemes in enumerate(results):
+                if phonemes is None:
+                    results[i] = self._text_to_basic_ipa(text_list[i])
+                    _phoneme_fallbacks += 1
+            return results
+        
+        def _digit_ipa(self, digits):
+            """Look up a number from 0-999 in a table built on first use, or return None."""
+            # Only worth building when the process outlives this utterance; one-shot runs
+            # phonemize just the number they were given
+            if not _use_espeak_process:
+                return None
+            if self._digit_table is None:
+                self._digit_table = self._build_digit_table()
+            return self._digit_table.get(digits)
+        
+        def _build_digit_table(self):
+            """Phonemize 0-999 with the library or a single eSpeak run; empty if neither works."""
+            numbers = [str(n) for n in range(1000)]
+            outputs = self._run_engine(numbers)
+            if outputs is None:
+                # Never fall back to one spawn per number here
+                outputs = self._phonemize_batch(numbers) or []
+            
+            postproc = self._get_postproc()
+            table = {}
+            for number, phonemes in zip(numbers, outputs):
+                phonemes = postproc(phonemes) if phonemes else None
+                if phonemes:
+                    table[number] = phonemes
+            return table
+        
+        def _phonemize_cached(self, text_list):
+            """Phonemize through the phoneme cache, returning None for texts eSpeak could not handle"""
+            engine = self._cache_engine()
+            results = [phoneme_cache.get(engine, self.language, self.with_stress, text) for text in text_list]
+            missing = [i for i, phonemes in enumerate(results) if phonemes is None]
+            if not missing:
+                return results
+            
+            computed = self._phonemize_uncached([text_list[i] for i in missing])
+            new_entries = []
+            for i, phonemes in zip(missing, computed):
+                if phonemes:
+                    results[i] = phonemes
+                    new_entries.append((text_list[i], phonemes))
+            
+            # Only real eSpeak output is cached, never the emergency mapping; the library may
+            # have been dropped meanwhile, so the entries go under whoever produced them
+            phoneme_cache.put_many(self._cache_engine(), self.language, self.with_stress, new_entries)
+            return results
+        
+        def _cache_engine(self):
+            """Identify the eSpeak build answering for this backend in phoneme cache keys"""
+            kind = 'library' if self._engine is not None else 'exe'
+            identities = type(self)._identities
+            if kind not in identities:
+                if self._engine is not None:
+                    path = self._engine.library_path
+                else:
+                    path = shutil.which(self.espeak_exe) or self.espeak_exe
+                identities[kind] = f"{kind}|{_espeak_identity(path)}"
+            return identities[kind]
+        
+        def _phonemize_uncached(self, text_list):
+            """Run eSpeak on every text, returning None for texts it could not phonemize"""
+            # eSpeak runs first: it may drop the library, which changes the version to probe
+            outputs = self._run_espeak(text_list)
+            postproc = self._get_postproc()
+            return [postproc(phonemes) or None if phonemes else None for phonemes in outputs]
+        
+        def _get_postproc(self):
+            cls = type(self)
+            if cls._postproc is None:
+                # The bridge usually runs once per utterance, so the probe result is kept on disk
+                # under the same build identity as the cached phonemes
+                engine = self._cache_engine()
+                info = phoneme_cache.get_version(engine)
+                if info is None:
+                    version = self._probe_version()
+                    phoneme_cache.put_version(engine, '.'.join(map(str, version)) if version else '')
+                else:
+                    version = _parse_espeak_version(info)
+                cls._postproc = _select_espeak_postproc(version)
+            return cls._postproc
+        
+        def _probe_version(self):
+            try:
+                if self._engine is not None:
+                    info = self._engine.version_info()
+                else:
+                    result = subprocess.run([self.espeak_exe, '--version'], capture_output=True, timeout=30,
+                                            **_SUBPROCESS_KW)
+                    info = result.stdout.decode('utf-8', 'replace')
+            except Exception:
+                info = ''
+            
+            version = _parse_espeak_version(info)
+            if version is None:
+                print("Warning: could not determine the eSpeak version, assuming 1.48.03 output", file=sys.stderr)
+            return version
+        
+        def _run_engine(self, text_list):
+            """Phonemize with the eSpeak library, or return None if it is unavailable or failed."""
+            if self._engine is None:
+                return None
+            try:
+                return [self._engine.g2p(text, self.language) or None for text in text_list]
+            except Exception:
+                # A library that loads but can't phonemize (e.g. an older build rejecting the
+                # voice) is dropped for good; espeak.exe may still work
+                cls = type(self)
+                cls._engine_failed = True
+                cls._postproc = None
+                self._engine = None
+                return None
+        
+        def _run_espeak(self, text_list):
+            results = self._run_engine(text_list)
+            if results is not None:
+                return results
+            
+            process = self._get_process()
+            if process is not None:
+                try:
+                    results = []
+                    for text in text_list:
+                        results.append(process.g2p(text) or None if text.strip() else None)
+                    return results
+                except Exception:
+                    # The pipe is broken; spawn eSpeak per call from now on
+                    process.close()
+                    self._process = None
+                    type(self)._process_failed = True
+            
+            results = self._phonemize_batch(text_list)
+            if results is None:
+                # Batch output could not be mapped back to the inputs, run eSpeak once per text
+                results = [self._phonemize_single(text) for text in text_list]
+            
+            return results
+        
+        def _get_process(self):
+            cls = type(self)
+            if self._process is None and _use_espeak_process and not cls._process_failed:
                 try:
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30, encoding='utf-8')
-                    if result.returncode == 0 and result.stdout.strip():
-                        phonemes = result.stdout.strip()
-                        # Clean up the IPA output (remove extra whitespace, newlines)
-                        phonemes = ' '.join(phonemes.split())
-                        results.append(phonemes)
+                    self._process = EspeakProcess(self._espeak_command())
+                except Exception:
+                    cls._process_failed = True
+            return self._process
+        
+        def _espeak_command(self):
+            cmd = [self.espeak_exe, '-q', '--ipa']
+            if espeak_data.exists():
+                cmd.extend(['--path', str(espeak_data)])
+            return cmd
+        
+        def _phonemize_batch(self, text_list):
+            """Phonemize all texts with a single eSpeak run, or return None if that is not possible"""
+            indices = [i for i, text in enumerate(text_list) if text.strip()]
+            if not indices:
+                return [None] * len(text_list)
+            
+            # One paragraph per non-blank text; the blank line forces eSpeak to end the sentence.
+            # A text can span several output lines, so texts are separated by sentinel paragraphs
+            # and the leading one shows what the sentinel's line looks like
+            paragraphs = [' '.join(text_list[i].split()) for i in indices]
+            if len(paragraphs) > 1:
+                sentinel = EspeakProcess.SENTINEL
+                paragraphs = [sentinel] + [part for paragraph in paragraphs for part in (paragraph, sentinel)]
+            blob = '\n\n'.join(paragraphs)
+            
+            try:
+                result = subprocess.run(self._espeak_command() + ['--stdin'], input=blob.encode('utf-8'),
+                                        capture_output=True, timeout=30, **_SUBPROCESS_KW)
+                if result.returncode != 0:
+                    return None
+                
+                # Normalize whitespace on the raw bytes and decode each line only once
+                lines = [_WS_RE.sub(b' ', line).strip() for line in result.stdout.splitlines()]
+                lines = [line.decode('utf-8') for line in lines if line]
+            except Exception:
+                return None
+            
+            if len(indices) == 1:
+                outputs = [' '.join(lines)]
+            else:
+                # Every text must end up between two sentinel lines, otherwise the output can't be
+                # mapped back to the inputs with certainty
+                if not lines or lines[-1] != lines[0] or lines.count(lines[0]) != len(indices) + 1:
+                    return None
+                outputs = []
+                current = []
+                for line in lines[1:]:
+                    if line == lines[0]:
+                        outputs.append(' '.join(current))
+                        current = []
                     else:
-                        # If eSpeak fails, we need to provide some basic phoneme mapping
-                        # This is critical - returning plain text breaks KittenTTS neural network
-                        basic_phonemes = self._text_to_basic_ipa(text)
-                        results.append(basic_phonemes)
-                except Exception as e:
-                    # Emergency fallback with basic phoneme mapping
-                    basic_phonemes = self._text_to_basic_ipa(text)
-                    results.append(basic_phonemes)
+                        current.append(line)
             
+            results = [None] * len(text_list)
+            for i, phonemes in zip(indices, outputs):
+                results[i] = phonemes or None
             return results
         
+        def _phonemize_single(self, text):
+            # Use our bundled eSpeak to get proper IPA phonemes (not just text!)
+            try:
+                result = subprocess.run(self._espeak_command() + [text], capture_output=True, timeout=30,
+                                        **_SUBPROCESS_KW)
+                # Clean up the IPA output (remove extra whitespace, newlines) before decoding
+                phonemes = _WS_RE.sub(b' ', result.stdout).strip()
+                if result.returncode == 0 and phonemes:
+                    return phonemes.decode('utf-8')
+            except Exception:
+                pass
+            return None
+        
         def _text_to_basic_ipa(self, text):
             """Basic fallback text-to-IPA conversion when eSpeak fails"""
-            # Very basic character mapping for emergencies
-            # This is not perfect but better than returning plain English
-            basic_map = {
-                'a': 'æ', 'e': 'ɛ', 'i': 'ɪ', 'o': 'ɔ', 'u': 'ʊ',
-                'th': 'θ', 'sh': 'ʃ', 'ch': 'ʧ', 'ng': 'ŋ'
-            }
-            
-            result = text.lower()
-            for eng, ipa in basic_map.items():
-                result = result.replace(eng, ipa)
-            
-            return result
+            result = _BASIC_IPA_DIGRAPH_RE.sub(lambda m: _BASIC_IPA_DIGRAPHS[m.group(0)], text.lower())
+            return result.translate(_BASIC_IPA_VOWELS)
         
         @staticmethod
         def is_available():
@@ -162,36 +770,61 @@ try:
     
     # Now try to import KittenTTS
     from kittentts import KittenTTS
-    
-except ImportError as e:
-    print(json.dumps({
-        "success": False, 
-        "error": f"KittenTTS setup failed: {str(e)}. Ensure all dependencies are installed."
-    }), file=sys.stderr)
-    sys.exit(1)
-except Exception as e:
-    print(json.dumps({
-        "success": False, 
-        "error": f"Unexpected error during setup: {str(e)}"
-    }), file=sys.stderr)
-    sys.exit(1)
+    _PATCHED = True
+
+_VOICE_DESCRIPTIONS = {
+    'expr-voice-2-m': 'Male Voice #2 - Expressive',
+    'expr-voice-2-f': 'Female Voice #2 - Expressive', 
+    'expr-voice-3-m': 'Male Voice #3 - Expressive',
+    'expr-voice-3-f': 'Female Voice #3 - Expressive',
+    'expr-voice-4-m': 'Male Voice #4 - Expressive',
+    'expr-voice-4-f': 'Female Voice #4 - Expressive',
+    'expr-voice-5-m': 'Male Voice #5 - Expressive',
+    'expr-voice-5-f': 'Female Voice #5 - Expressive'
+}
+
+# The voice list never changes, so its JSON response is built once at import
+_VOICES_PAYLOAD = _dumps({
+    "success": True,
+    "voices": [
+        {"id": voice_id, "description": desc} 
+        for voice_id, desc in _VOICE_DESCRIPTIONS.items()
+    ]
+}) + "\n"
 
 class CarelessKittenBridge:
     """Bridge between Careless Whisper and KittenTTS with comprehensive patches."""
     
-    def __init__(self):
+    def __init__(self, result_stream=None, error_stream=None):
         self.model = None
-        self.supported_voices = [
-            'expr-voice-2-m', 'expr-voice-2-f', 
-            'expr-voice-3-m', 'expr-voice-3-f',
-            'expr-voice-4-m', 'expr-voice-4-f',
-            'expr-voice-5-m', 'expr-voice-5-f'
-        ]
+        self.result_stream = result_stream or sys.stdout
+        self.error_stream = error_stream or sys.stderr
+        self.model_name = "KittenML/kitten-tts-nano-0.1"
+        self._voice_order = tuple(_VOICE_DESCRIPTIONS)
+        self._supported_voices = frozenset(self._voice_order)
+        self._cache_dir = Path.home() / ".careless_whisper" / "tts_cache"
+        self._cache_max_bytes = 500 * 1024 * 1024
+        self._pool = None
+    
+    def verify_installation(self):
+        """Install the patches and import KittenTTS, without loading the model."""
+        try:
+            _install_patches()
+            return True
+        except ImportError as e:
+            self._error(f"KittenTTS setup failed: {str(e)}. Ensure all dependencies are installed.")
+            return False
+        except Exception as e:
+            self._error(f"Unexpected error during setup: {str(e)}")
+            return False
     
     def initialize_model(self):
         """Initialize KittenTTS model."""
+        if not self.verify_installation():
+            return False
+        
         try:
-            self.model = KittenTTS("KittenML/kitten-tts-nano-0.1")
+            self.model = KittenTTS(self.model_name)
             return True
         except Exception as e:
             self._error(f"Failed to initialize KittenTTS: {e}")
@@ -199,14 +832,10 @@ class CarelessKittenBridge:
     
     def generate_audio(self, text: str, voice: str, speed: float, output_path: str):
         """Generate TTS audio and save to file."""
-        if not self.model:
-            if not self.initialize_model():
-                return False
-        
         try:
             # Validate voice
-            if voice not in self.supported_voices:
-                self._error(f"Unsupported voice: {voice}. Supported: {', '.join(self.supported_voices)}")
+            if voice not in self._supported_voices:
+                self._error(f"Unsupported voice: {voice}. Supported: {', '.join(self._voice_order)}")
                 return False
             
             # Validate speed
@@ -214,30 +843,46 @@ class CarelessKittenBridge:
                 self._error(f"Speed must be between 0.5 and 2.0, got: {speed}")
                 return False
             
-            # Generate audio
-            self.model.generate_to_file(
-                text=text,
-                output_path=output_path,
-                voice=voice,
-                speed=speed
-            )
+            # Repeated phrases are served from the audio cache without loading the model
+            cached_path = self._cache_path(text, voice, speed, output_path)
+            cached = self._copy_from_cache(cached_path, output_path)
             
-            # Verify output file exists and has content
-            if not os.path.exists(output_path):
+            if not cached:
+                if not self.model:
+                    if not self.initialize_model():
+                        return False
+                
+                # Generate audio
+                fallbacks_before = _phoneme_fallbacks
+                self.model.generate_to_file(
+                    text=text,
+                    output_path=output_path,
+                    voice=voice,
+                    speed=speed
+                )
+            
+            # Verify output file exists and has content (one stat call covers both)
+            try:
+                file_size = os.stat(output_path).st_size
+            except FileNotFoundError:
                 self._error(f"Output file not created: {output_path}")
                 return False
             
-            file_size = os.path.getsize(output_path)
             if file_size == 0:
                 self._error(f"Output file is empty: {output_path}")
                 return False
             
+            # Audio made from emergency phonemes would replay one eSpeak failure forever
+            if not cached and _phoneme_fallbacks == fallbacks_before:
+                self._store_in_cache(output_path, cached_path)
+            
             self._success({
                 "output_path": output_path,
                 "file_size": file_size,
                 "voice": voice,
                 "speed": speed,
-                "text_length": len(text)
+                "text_length": len(text),
+                "cached": cached
             })
             return True
             
@@ -245,48 +890,262 @@ class CarelessKittenBridge:
             self._error(f"TTS generation failed: {e}")
             return False
     
+    def _cache_path(self, text, voice, speed, output_path):
+        # The output suffix picks the audio format, so it is part of the key
+        suffix = Path(output_path).suffix.lower()
+        key = hashlib.blake2b(f"{self.model_name}|{voice}|{speed}|{suffix}|{text}".encode('utf-8'),
+                              digest_size=16).hexdigest()
+        return self._cache_dir / f"{key}{suffix}"
+    
+    def _copy_from_cache(self, cached_path, output_path):
+        """Copy a cached audio file to output_path, returning False on a miss."""
+        try:
+            shutil.copyfile(cached_path, output_path)
+            # Touch the entry so eviction treats it as recently used
+            os.utime(cached_path)
+            return True
+        except OSError:
+            return False
+    
+    def _store_in_cache(self, output_path, cached_path):
+        """Add a freshly generated audio file to the cache; failures only cost a future cache hit."""
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write under a temporary name so concurrent bridges never read a partial file
+            partial_path = cached_path.with_name(f"{cached_path.stem}.{os.getpid()}.tmp")
+            shutil.copyfile(output_path, partial_path)
+            os.replace(partial_path, cached_path)
+            self._evict_cache()
+        except OSError:
+            pass
+    
+    def _evict_cache(self):
+        """Delete least recently used audio files until the cache fits in its size budget."""
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self._cache_dir):
+            # Skip partial files another bridge is still writing
+            if not entry.name.endswith(".tmp"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total_size += st.st_size
+        
+        if total_size <= self._cache_max_bytes:
+            return
+        
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total_size -= size
+            if total_size <= self._cache_max_bytes:
+                break
+    
     def list_voices(self):
         """List available voices."""
-        voice_descriptions = {
-            'expr-voice-2-m': 'Male Voice #2 - Expressive',
-            'expr-voice-2-f': 'Female Voice #2 - Expressive', 
-            'expr-voice-3-m': 'Male Voice #3 - Expressive',
-            'expr-voice-3-f': 'Female Voice #3 - Expressive',
-            'expr-voice-4-m': 'Male Voice #4 - Expressive',
-            'expr-voice-4-f': 'Female Voice #4 - Expressive',
-            'expr-voice-5-m': 'Male Voice #5 - Expressive',
-            'expr-voice-5-f': 'Female Voice #5 - Expressive'
-        }
-        
-        voices = [
-            {"id": voice_id, "description": desc} 
-            for voice_id, desc in voice_descriptions.items()
-        ]
-        
-        self._success({"voices": voices})
+        self.result_stream.write(_VOICES_PAYLOAD)
+        self.result_stream.flush()
+    
+    def serve(self, requests, workers=1):
+        """Answer newline-delimited JSON requests until EOF, keeping the model loaded."""
+        if not self.initialize_model():
+            return False
+        
+        try:
+            for line in requests:
+                line = line.strip()
+                if not line:
+                    continue
+                
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    self._error(f"Invalid request: {e}")
+                    continue
+                
+                if isinstance(request, dict) and request.get("command") == "batch":
+                    self.run_batch(request.get("jobs"), workers)
+                else:
+                    self.handle_request(request)
+        finally:
+            self.close()
+        
+        return True
+    
+    def handle_request(self, request):
+        """Run one JSON request (a TTS job or a command) and output its result."""
+        if not isinstance(request, dict):
+            self._error("Invalid request: expected a JSON object")
+            return False
+        
+        if request.get("command") == "list-voices":
+            self.list_voices()
+            return True
+        
+        text = request.get("text")
+        output_path = request.get("output")
+        if not text or not output_path:
+            self._error("Both text and output are required for TTS generation")
+            return False
+        
+        try:
+            speed = float(request.get("speed", 1.0))
+        except (TypeError, ValueError):
+            self._error(f"Invalid speed: {request.get('speed')}")
+            return False
+        
+        return self.generate_audio(text, request.get("voice", "expr-voice-2-f"), speed, output_path)
+    
+    def run_batch(self, jobs, workers=1):
+        """Run a list of TTS jobs, outputting one result per job in order."""
+        if not isinstance(jobs, list):
+            self._error("Invalid batch: expected a list of jobs")
+            return False
+        
+        if workers <= 1 or len(jobs) <= 1:
+            results = [self.handle_request(job) for job in jobs]
+            return all(results)
+        
+        from concurrent.futures.process import BrokenProcessPool
+        
+        try:
+            outcomes = list(self._get_pool(workers).map(_run_batch_job, jobs))
+        except BrokenProcessPool as e:
+            self.close()
+            self._error(f"Batch worker crashed: {e}")
+            return False
+        
+        for success, output in outcomes:
+            self.result_stream.write(output)
+        self.result_stream.flush()
+        return all(success for success, _ in outcomes)
+    
+    def _get_pool(self, workers):
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            
+            # Never fork: by now this process holds an ONNX session and eSpeak reader threads.
+            # Workers start clean (from the fork server where available) and load their own model
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            context = multiprocessing.get_context(start_method)
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                             initializer=_init_batch_worker)
+        return self._pool
+    
+    def close(self):
+        """Shut down batch worker processes, if any were started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
     
     def _success(self, data):
         """Output success result."""
         result = {"success": True, **data}
-        print(json.dumps(result))
+        self._write_result(result, self.result_stream)
     
     def _error(self, message):
         """Output error result."""
         result = {"success": False, "error": message}
-        print(json.dumps(result), file=sys.stderr)
+        self._write_result(result, self.error_stream)
+    
+    def _write_result(self, result, stream):
+        buffer = getattr(stream, 'buffer', None)
+        if orjson is not None and buffer is not None:
+            # orjson already produces UTF-8 bytes, so skip the str round trip through print
+            stream.flush()
+            buffer.write(orjson.dumps(result) + b"\n")
+            buffer.flush()
+        else:
+            print(_dumps(result), file=stream, flush=True)
+
+# Per-process bridge used by batch workers
+_batch_bridge = None
+
+def _init_batch_worker():
+    """Give each batch worker its own model and a buffer to collect job results."""
+    global _batch_bridge, _use_espeak_process
+    sys.stdout = sys.stderr
+    _use_espeak_process = True
+    results = io.StringIO()
+    _batch_bridge = CarelessKittenBridge(result_stream=results, error_stream=results)
+    _batch_bridge.initialize_model()
+
+def _run_batch_job(job):
+    results = _batch_bridge.result_stream
+    results.seek(0)
+    results.truncate()
+    success = _batch_bridge.handle_request(job)
+    return success, results.getvalue()
 
 def main():
+    global _use_espeak_process
+    import argparse
+    
     parser = argparse.ArgumentParser(description="KittenTTS bridge for Careless Whisper")
     parser.add_argument("--text", required=False, help="Text to convert to speech")
     parser.add_argument("--voice", default="expr-voice-2-f", help="Voice to use")
     parser.add_argument("--speed", type=float, default=1.0, help="Speech speed (0.5-2.0)")
     parser.add_argument("--output", required=False, help="Output audio file path")
     parser.add_argument("--list-voices", action="store_true", help="List available voices")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check that KittenTTS and its dependencies import (used as the install check)")
+    parser.add_argument("--server", action="store_true",
+                        help="Keep the model loaded and answer JSON requests from stdin, one per line")
+    parser.add_argument("--batch", help="JSON file with a list of {text, voice, speed, output} jobs")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for batch jobs")
+    parser.add_argument("--write-bootstrap-env", action="store_true",
+                        help="Precompute the bundle's sys.path into _bootstrap_env.json (run at packaging time)")
     
     args = parser.parse_args()
     
+    if args.server:
+        # Every response goes to stdout so the caller can pair it with its request;
+        # anything the TTS libraries print is diverted to stderr to keep that channel clean
+        sys.stdin.reconfigure(encoding='utf-8')
+        _use_espeak_process = True
+        responses = sys.stdout
+        sys.stdout = sys.stderr
+        bridge = CarelessKittenBridge(result_stream=responses, error_stream=responses)
+        sys.exit(0 if bridge.serve(sys.stdin, args.workers) else 1)
+    
+    if args.batch:
+        # Like --server, every job result (success or error) is written to stdout in job order
+        _use_espeak_process = True
+        responses = sys.stdout
+        sys.stdout = sys.stderr
+        bridge = CarelessKittenBridge(result_stream=responses, error_stream=responses)
+        try:
+            jobs = json.loads(Path(args.batch).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            bridge._error(f"Failed to read batch file: {e}")
+            sys.exit(1)
+        
+        try:
+            success = bridge.run_batch(jobs, args.workers)
+        finally:
+            bridge.close()
+        sys.exit(0 if success else 1)
+    
     bridge = CarelessKittenBridge()
     
+    if args.write_bootstrap_env:
+        try:
+            bootstrap_path = write_bootstrap_env(Path(__file__).parent.absolute())
+        except OSError as e:
+            bridge._error(f"Failed to write bootstrap environment: {e}")
+            sys.exit(1)
+        bridge._success({"bootstrap_path": str(bootstrap_path)})
+        return
+    
+    if args.verify:
+        if not bridge.verify_installation():
+            sys.exit(1)
+        bridge._success({"message": "KittenTTS installation verified"})
+        return
+    
     if args.list_voices:
         bridge.list_voices()
         return
@@ -119,6 +119,16 @@ try {
     if (Test-Path $bridgeSource) {
         Copy-Item -Path $bridgeSource -Destination $bridgeTarget
         Write-Host "Bridge script copied to Python directory" -ForegroundColor Green
+        
+        # Precompute the bridge's sys.path for this bundle so it skips the scrub on every start.
+        # The app runs scripts\kitten_tts_bridge.py, so the file is written next to that copy
+        # with paths relative to scripts\ (which ships alongside the python directory)
+        & $pythonExe $bridgeSource --write-bootstrap-env | Out-Null
+        if ($LASTEXITCODE -eq 0) {
+            Write-Host "Bridge bootstrap environment written" -ForegroundColor Green
+        } else {
+            Write-Host "WARNING: Could not write bridge bootstrap environment, it will be computed at runtime" -ForegroundColor Yellow
+        }
     } else {
         Write-Host "WARNING: Bridge script not found at $bridgeSource" -ForegroundColor Yellow
     }
@@ -129,7 +139,7 @@ try {
         
         $testScript = Join-Path $OutputDir "kitten_tts_bridge.py"
         if (Test-Path $testScript) {
-            $pipelineTest = & $pythonExe $testScript --list-voices 2>&1
+            $pipelineTest = & $pythonExe $testScript --verify 2>&1
             if ($LASTEXITCODE -eq 0) {
                 Write-Host "Complete TTS pipeline test successful" -ForegroundColor Green
                 if ($Verbose) {